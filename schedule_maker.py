@@ -1,16 +1,22 @@
 import pandas as pd
+import numpy as np
 import datetime as dt
 from ortools.sat.python import cp_model
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill, Font
-from openpyxl.utils import get_column_letter
-import math
+import os
+import pickle
+from collections import defaultdict
+import importlib.util
 
 # ------------------------------
 # User parameters / tweakable weights
 # ------------------------------
 INPUT_FILE = "input.xlsx"
 OUT_FILE = "monthly_schedule.xlsx"
+# parsed "Doctors" sheet is cached here and reused while the input file is unchanged
+INPUT_CACHE_FILE = INPUT_FILE + ".cache.pkl"
+# read the input with the much faster calamine engine when python-calamine is
+# installed, otherwise with pandas' default (openpyxl)
+INPUT_EXCEL_ENGINE = "calamine" if importlib.util.find_spec("python_calamine") else None
 
 # weights for the combined objective (tweak to taste)
 W_EVERY_OTHER_PENALTY = 4       # penalty for every-other patterns
@@ -23,10 +29,46 @@ W_DIFF_WKEND_DUTY_DAY = 2       # weight for balancing weekend days of duty
 # solver time limit seconds
 SOLVER_TIME_LIMIT = 120
 
+# CP-SAT search tuning (see sat_parameters.proto for the meaning of each level)
+SOLVER_NUM_WORKERS = 16         # parallel portfolio size
+SOLVER_PRESOLVE = True          # CP-SAT presolve (the default, kept explicit)
+SOLVER_LOG_PROGRESS = True      # print the CP-SAT search log
+SOLVER_LINEARIZATION_LEVEL = 2  # 0 = none, 1 = default, 2 = full LP relaxation
+SOLVER_PROBING_LEVEL = 2        # presolve probing effort
+SOLVER_SYMMETRY_LEVEL = 2       # symmetry detection effort
+SOLVER_OPTIMIZE_WITH_CORE = True  # core-based search for the weighted objective
+SOLVER_RELATIVE_GAP_LIMIT = 0.01  # stop once within 1% of the best bound
+# patch an infeasible greedy hint instead of dropping it. Off by default: with
+# the multi-worker portfolio, ortools 9.15 can abort on a failed internal check
+# ("heuristics.fixed_search != nullptr") when the hint needs repairing
+SOLVER_REPAIR_HINT = False
+
 # ------------------------------
 # 1. Read input Excel
 # ------------------------------
-doctors_df = pd.read_excel(INPUT_FILE, sheet_name="Doctors")
+# read_excel is slow, so reuse the cached DataFrame when the input file's
+# mtime and size still match the ones it was cached with.
+# The cache is a pickle next to the input and loading it runs whatever it
+# contains, so only keep input files in a directory you trust
+input_sig = (os.path.getmtime(INPUT_FILE), os.path.getsize(INPUT_FILE))
+doctors_df = None
+if os.path.exists(INPUT_CACHE_FILE):
+    try:
+        with open(INPUT_CACHE_FILE, "rb") as f:
+            cached_sig, cached_df = pickle.load(f)
+        if cached_sig == input_sig:
+            doctors_df = cached_df
+    except Exception:
+        # unreadable cache, fall back to the Excel file
+        pass
+if doctors_df is None:
+    doctors_df = pd.read_excel(INPUT_FILE, sheet_name="Doctors", engine=INPUT_EXCEL_ENGINE)
+    try:
+        with open(INPUT_CACHE_FILE, "wb") as f:
+            pickle.dump((input_sig, doctors_df), f)
+    except OSError:
+        # the cache is only a speed-up, e.g. the input directory may be read-only
+        pass
 
 # Choose month/year: default = next month
 today = dt.date.today()
@@ -42,35 +84,48 @@ first_day = dt.date(year_for_schedule, month_for_schedule, 1)
 import calendar
 days_in_month = calendar.monthrange(year_for_schedule, month_for_schedule)[1]
 last_day = dt.date(year_for_schedule, month_for_schedule, days_in_month)
-dates = [first_day + dt.timedelta(days=i) for i in range((last_day - first_day).days + 1)]
+date_index = pd.date_range(first_day, periods=days_in_month, freq="D")
+dates = [d.date() for d in date_index]
 print(f"Creating schedule for: {first_day} → {last_day}")
 
-# Identify weekends
-is_weekend = {d: (d.weekday() >= 5) for d in dates}
+# Identify weekends: weekday number of every date index, taken from the
+# DatetimeIndex in one go (0 = Monday ... 6 = Sunday); is_weekend[i] is True
+# for Saturday/Sunday
+wd = date_index.weekday.to_numpy().astype(np.int8)
+is_weekend = wd >= 5
+weekend_idx = np.flatnonzero(is_weekend).tolist()
+fridays = np.flatnonzero(wd == 4).tolist()
+saturdays = np.flatnonzero(wd == 5).tolist()
+sundays = np.flatnonzero(wd == 6).tolist()
 
 # Parse unavailability column (expects comma-separated day numbers, e.g. "1,2,15")
-unavailability = {}
-for idx, row in doctors_df.iterrows():
-    doc = row["Doctor"]
-    raw = row.get("Unavailability", "")
-    if pd.isna(raw) or str(raw).strip() == "":
-        unavailable_days = []
-    else:
-        # allow entries like "1, 2, 15" or "5"
-        tokens = [t.strip() for t in str(raw).split(",") if t.strip() != ""]
-        unavailable_days = []
-        for t in tokens:
-            try:
-                day_num = int(t)
-                if 1 <= day_num <= len(dates):
-                    unavailable_days.append(dt.date(year_for_schedule, month_for_schedule, day_num))
-                else:
-                    print(f"Warning: day {day_num} out of range for {month_for_schedule}/{year_for_schedule}")
-            except ValueError:
-                # ignore bad tokens
-                print(f"Warning: could not parse unavailability token '{t}' for doctor {doc}")
-    doctors_df.at[idx, "Unavailability"] = unavailable_days
-    unavailability[doc] = set(unavailable_days)
+# Tokens are split and converted for all doctors at once with pandas string ops;
+# each token keeps the row index of its doctor after explode()
+if "Unavailability" in doctors_df.columns:
+    raw_unavail = doctors_df["Unavailability"]
+else:
+    raw_unavail = pd.Series("", index=doctors_df.index)
+# allow entries like "1, 2, 15" or "5"; each token is stripped on its own, so
+# inner whitespace ("1 5") still makes it a bad token
+tokens = raw_unavail.fillna("").astype(str).str.split(",").explode().str.strip()
+tokens = tokens[tokens != ""]
+
+# ignore bad tokens (anything but plain digits, e.g. "2.0", "+3", "1e1")
+bad_tokens = ~tokens.str.fullmatch(r"[0-9]+")
+for idx, t in tokens[bad_tokens].items():
+    print(f"Warning: could not parse unavailability token '{t}' for doctor {doctors_df.at[idx, 'Doctor']}")
+day_nums = tokens[~bad_tokens].astype(int)
+
+in_range = (day_nums >= 1) & (day_nums <= len(dates))
+for day_num in day_nums[~in_range]:
+    print(f"Warning: day {day_num} out of range for {month_for_schedule}/{year_for_schedule}")
+day_nums = day_nums[in_range]
+
+# Group the unavailable days back per doctor as date indices (day n of the
+# month is dates[n - 1]), so membership checks hash small ints, not dates
+token_docs = doctors_df["Doctor"].loc[day_nums.index].to_numpy()
+unavail_idx = {doc: set() for doc in doctors_df["Doctor"]}
+unavail_idx.update((day_nums - 1).groupby(token_docs).agg(set).to_dict())
 
 doctors_list = doctors_df["Doctor"].tolist()
 num_docs = len(doctors_list)
@@ -80,13 +135,36 @@ num_docs = len(doctors_list)
 # ------------------------------
 model = cp_model.CpModel()
 
-# Create variables x[(i,doc)] = 1 if doc assigned on date index i
-x = {}
-for i, day in enumerate(dates):
-    for doc in doctors_list:
-        if day in unavailability.get(doc, set()):
+# Doctors are referred to by their position j in doctors_list inside the model
+doc_idx = {doc: j for j, doc in enumerate(doctors_list)}
+
+# Create variables x_arr[i][j] = 1 if doctor j assigned on date index i
+# (None where the doctor is unavailable). Doctor-major, so each doctor's
+# unavailable set is fetched once
+x_arr = [[None] * num_docs for _ in dates]
+for j, doc in enumerate(doctors_list):
+    bad = unavail_idx[doc]
+    for i in range(len(dates)):
+        if i in bad:
             continue
-        x[(i, doc)] = model.NewBoolVar(f"x_{i}_{doc}")
+        x_arr[i][j] = model.NewBoolVar(f"x_{i}_{j}")
+
+# Dense per-doctor columns (x_by_doc[j][i], None where unavailable) and the
+# available variables of every day, so the constraint loops below index
+# plain lists instead of re-walking x_arr
+x_by_doc = [list(col) for col in zip(*x_arr)]
+x_by_day = [[v for v in row if v is not None] for row in x_arr]
+
+# Precompute per-doctor variable lists once, instead of re-scanning the
+# calendar with None guards in every constraint
+doc_all_vars = {
+    doc: [v for v in x_by_doc[j] if v is not None]
+    for j, doc in enumerate(doctors_list)
+}
+doc_wkend_vars = {
+    doc: [x_by_doc[j][i] for i in weekend_idx if x_by_doc[j][i] is not None]
+    for j, doc in enumerate(doctors_list)
+}
 
 # Check if we have enough doctors to cover all days
 max_possible_duties = len(doctors_list) * 7
@@ -96,13 +174,13 @@ if max_possible_duties < len(dates):
     allow_unassigned_tuesdays = True
 
 # Exactly one doctor per day
-for i, day in enumerate(dates):
-    if allow_unassigned_tuesdays and day.weekday() == 1:  # 1 = Tuesday
+for i, day_vars in enumerate(x_by_day):
+    if allow_unassigned_tuesdays and wd[i] == 1:  # 1 = Tuesday
         # Either 0 or 1 doctor (so it can be left unassigned)
-        model.Add(sum(x.get((i,doc), 0) for doc in doctors_list) <= 1)
+        model.Add(cp_model.LinearExpr.Sum(day_vars) <= 1)
     else:
         # Normal rule: exactly 1 doctor assigned
-        model.Add(sum(x.get((i,doc), 0) for doc in doctors_list) == 1)
+        model.Add(cp_model.LinearExpr.Sum(day_vars) == 1)
 
 
 # Balanced total duties per doctor (difference at most 1)
@@ -110,73 +188,117 @@ total_days = len(dates)
 min_days = total_days // num_docs
 max_days = min_days if total_days % num_docs == 0 else min_days + 1
 for doc in doctors_list:
-    model.Add(sum(x.get((i, doc), 0) for i in range(len(dates))) >= min_days)
-    model.Add(sum(x.get((i, doc), 0) for i in range(len(dates))) <= max_days)
+    duties_sum = cp_model.LinearExpr.Sum(doc_all_vars[doc])
+    model.Add(duties_sum >= min_days)
+    model.Add(duties_sum <= max_days)
     
     # hard constraint: no more than 7 duties in the month
-    model.Add(sum(x.get((i, doc), 0) for i in range(len(dates))) <= 7)
+    model.Add(duties_sum <= 7)
+
+# Symmetry breaking: doctors with identical unavailability are interchangeable,
+# so require their assignment vectors to be lexicographically ordered (the
+# first day on which a and b differ goes to a). This keeps one schedule out of
+# every set of permutations. The Python API has no lex constraint, so it is
+# encoded with "prefix equal so far" booleans
+symmetric_groups = defaultdict(list)
+for doc in doctors_list:
+    symmetric_groups[frozenset(unavail_idx[doc])].append(doc)
+for group in symmetric_groups.values():
+    for a, b in zip(group, group[1:]):
+        # identical availability, so both lists cover the same days in the same order
+        vec_a, vec_b = doc_all_vars[a], doc_all_vars[b]
+        prefix_eq = None  # empty prefix: always equal
+        for k, (va, vb) in enumerate(zip(vec_a, vec_b)):
+            ct = model.Add(va >= vb)
+            if prefix_eq is not None:
+                ct.OnlyEnforceIf(prefix_eq)
+            if k == len(vec_a) - 1:
+                break
+            # prefix equal and va == vb => eq. The reverse is not needed: a
+            # spurious eq = 1 only adds constraints
+            eq = model.NewBoolVar(f"lex_eq_{k}_{doc_idx[a]}")
+            not_prefix = [] if prefix_eq is None else [prefix_eq.Not()]
+            model.AddBoolOr(not_prefix + [va, vb, eq])
+            model.AddBoolOr(not_prefix + [va.Not(), vb.Not(), eq])
+            prefix_eq = eq
 
 # No consecutive duties (hard constraint)
-for i in range(len(dates) - 1):
-    for doc in doctors_list:
-        model.Add(x.get((i, doc), 0) + x.get((i + 1, doc), 0) <= 1)
+# (only needed when the doctor is available on both days; posted as an
+# AtMostOne so presolve can merge it with the one-doctor-per-day cliques)
+for xd in x_by_doc:
+    for i in range(len(dates) - 1):
+        if xd[i] is not None and xd[i + 1] is not None:
+            model.AddAtMostOne([xd[i], xd[i + 1]])
 
 # Balance number of weekend/weekday duties (difference at most 1)
-total_weekends = sum(1 for d in dates if is_weekend[d])
+total_weekends = len(weekend_idx)
 min_wkend = total_weekends // num_docs
 max_wkend = min_wkend if total_weekends % num_docs == 0 else min_wkend + 1
 for doc in doctors_list:
-    model.Add(sum(x.get((i, doc), 0) for i, d in enumerate(dates) if is_weekend[d]) >= min_wkend)
-    model.Add(sum(x.get((i, doc), 0) for i, d in enumerate(dates) if is_weekend[d]) <= max_wkend)
+    wkend_sum = cp_model.LinearExpr.Sum(doc_wkend_vars[doc])
+    model.Add(wkend_sum >= min_wkend)
+    model.Add(wkend_sum <= max_wkend)
 
 
 # ------------------------------
 # Soft preference variables (we'll combine into one objective)
 # ------------------------------
 every_other_vars = []     # patterns i and i+2 both assigned
-gap2_vars = []            # same as every_other, kept separately if you want different weights
 block_deviation_vars = []    # deviation from ideal per block
 full_weekend_off_bonus = []  # reward for full weekend off (Fri+Sat+Sun)
 balanced_full_wkends_off_deviation_vars = [] # deviation vars for balancing full weekends off
 different_weekend_duty_day_vars = []  # vars to balance weekend duty days
+# upper bounds of the IntVar lists above, kept in step to bound the objective
+block_deviation_ubs = []
+block_deviation_spans = []  # (doc, start, end) of each block deviation var, for the warm start
+different_weekend_duty_day_ubs = []
 
 # penalize every-other patterns (i,i+2)
-for doc in doctors_list:
+for doc, xd in zip(doctors_list, x_by_doc):
     for i in range(len(dates) - 2):
-        if (i, doc) in x and (i + 2, doc) in x:
-            b = model.NewBoolVar(f"everyother_{i}_{doc}")
-            model.Add(x[(i, doc)] + x[(i + 2, doc)] == 2).OnlyEnforceIf(b)
-            model.Add(x[(i, doc)] + x[(i + 2, doc)] != 2).OnlyEnforceIf(b.Not())
-            every_other_vars.append(b)
-            gap2_vars.append(b)
+        if xd[i] is not None and xd[i + 2] is not None:
+            # pair is forced to 1 when both days are assigned; the penalty pushes it down otherwise
+            pair = model.NewIntVar(0, 1, f"eo_{i}_{doc_idx[doc]}")
+            model.Add(pair >= xd[i] + xd[i + 2] - 1)
+            every_other_vars.append(pair)
 
 # Block balancing: split month into blocks (4 blocks) and penalize deviation from ideal per block
 num_blocks = 4
-block_size = math.ceil(len(dates) / num_blocks)
-ideal_total_per_doc = total_days / num_docs
-ideal_per_block = ideal_total_per_doc / num_blocks  # target duties per doc per block (float)
+block_size = -(-len(dates) // num_blocks)  # ceil division
+# target duties per doc per block is total_days / (num_docs * num_blocks);
+# rounded ideal for block (we want integer target near ideal), in exact integer arithmetic
+docs_blocks = num_docs * num_blocks
+rounded_ideal_low = total_days // docs_blocks
+rounded_ideal_high = -(-total_days // docs_blocks)
 # We'll create integer deviation vars capturing absolute deviation from rounded ideal
-for doc in doctors_list:
+for doc, xd in zip(doctors_list, x_by_doc):
     for b in range(num_blocks):
         start = b * block_size
         end = min((b + 1) * block_size, len(dates))
         if start >= end:
             continue
-        duties_vars = [x[(i, doc)] for i in range(start, end) if (i, doc) in x]
+        duties_vars = [v for v in xd[start:end] if v is not None]
         if not duties_vars:
             # doc unavailable for entire block - create a 0 deviation (no var)
             continue
-        duties_sum = sum(duties_vars)
-        # rounded ideal for block (we want integer target near ideal)
-        rounded_ideal_low = int(math.floor(ideal_per_block))
-        rounded_ideal_high = int(math.ceil(ideal_per_block))
+        duties_sum = cp_model.LinearExpr.Sum(duties_vars)
         # We'll allow deviation from rounded ideal; create a deviation variable "dev >= abs(duties_sum - rounded_ideal)"
-        dev = model.NewIntVar(0, len(dates), f"dev_block_{b}_{doc}")
-        # dev >= duties_sum - rounded_ideal_high
-        model.Add(duties_sum - rounded_ideal_high <= dev)
-        # dev >= rounded_ideal_low - duties_sum
-        model.Add(rounded_ideal_low - duties_sum <= dev)
+        # the largest possible deviation is a full block of duties (or none at all)
+        dev_ub = max(end - start - rounded_ideal_high, rounded_ideal_low)
+        dev = model.NewIntVar(0, dev_ub, f"dev_block_{b}_{doc_idx[doc]}")
+        if rounded_ideal_low == rounded_ideal_high:
+            # integer ideal: dev is exactly |duties_sum - ideal|, which CP-SAT
+            # propagates natively
+            model.AddAbsEquality(dev, duties_sum - rounded_ideal_low)
+        else:
+            # anything between the two roundings is ideal, which |.| cannot express
+            # dev >= duties_sum - rounded_ideal_high
+            model.Add(duties_sum - rounded_ideal_high <= dev)
+            # dev >= rounded_ideal_low - duties_sum
+            model.Add(rounded_ideal_low - duties_sum <= dev)
         block_deviation_vars.append(dev)
+        block_deviation_ubs.append(dev_ub)
+        block_deviation_spans.append((doc, start, end))
       
 
 # Count full weekends off per doctor
@@ -184,130 +306,187 @@ weekends_off_per_doc = {
     doc: [] for doc in doctors_list
 }      
         
+# full weekends a doctor is unavailable for, hence off without a variable
+fixed_weekends_off = {doc: 0 for doc in doctors_list}
+
+# Collect all "full weekend" indices: Fri, Sat, Sun sequences
+full_weekends = [(i, i + 1, i + 2) for i in fridays if i + 2 < len(dates)]
+
 # Full weekend off bonus (Fri+Sat+Sun)
 # Reward if a doctor has an entire weekend off (Fri, Sat, Sun)
-for i, day in enumerate(dates):
-    if day.weekday() == 4:  # Friday
-        sat_idx = i + 1 if i + 1 < len(dates) else None
-        sun_idx = i + 2 if i + 2 < len(dates) else None
-        if sat_idx is not None and sun_idx is not None:
-            for doc in doctors_list:
-                vars_window = [
-                    x.get((i,doc), 0),
-                    x.get((sat_idx,doc), 0),
-                    x.get((sun_idx,doc), 0)
-                ]
-                b = model.NewBoolVar(f"full_wkend_off_{i}_{doc}")
-                model.Add(sum(vars_window) == 0).OnlyEnforceIf(b)
-                model.Add(sum(vars_window) != 0).OnlyEnforceIf(b.Not())
-                full_weekend_off_bonus.append(b)
-                weekends_off_per_doc[doc].append(b)
-
-total_full_weekends = len([d for d in dates if d.weekday() == 4])  # number of Fridays
+for fri, sat, sun in full_weekends:
+    for doc, xd in zip(doctors_list, x_by_doc):
+        vars_window = [xd[k] for k in (fri, sat, sun) if xd[k] is not None]
+        if not vars_window:
+            # unavailable the whole weekend: it is off regardless, so count it
+            # as a constant instead of a BoolVar that presolve would fix to 1
+            fixed_weekends_off[doc] += 1
+            continue
+        b = model.NewBoolVar(f"full_wkend_off_{fri}_{doc_idx[doc]}")
+        window_sum = cp_model.LinearExpr.Sum(vars_window)
+        # b => no duty Fri/Sat/Sun, as a plain linear constraint (no enforcement literal)
+        model.Add(window_sum + 3 * b <= 3)
+        # not b => at least one duty. The bonus alone would not need this, but
+        # weekends_off_per_doc feeds the balance penalty below (and the hard
+        # constraint), which could otherwise under-count free weekends
+        model.Add(window_sum + b >= 1)
+        full_weekend_off_bonus.append(b)
+        weekends_off_per_doc[doc].append(b)
+
+# Hard constraint: at least one full weekend off. The bonus booleans above
+# already mean "Fri+Sat+Sun all off", so they are reused instead of a second set
+for doc in doctors_list:
+    if weekends_off_per_doc[doc] and not fixed_weekends_off[doc]:
+        model.Add(cp_model.LinearExpr.Sum(weekends_off_per_doc[doc]) >= 1)
+
+total_full_weekends = len(fridays)  # number of Fridays
 min_wkend_off = total_full_weekends // len(doctors_list)
 max_wkend_off = min_wkend_off if total_full_weekends % len(doctors_list) == 0 else min_wkend_off + 1
 
 full_weekends_off_count = {
-    doc: sum(weekends_off_per_doc[doc]) for doc in doctors_list
+    doc: cp_model.LinearExpr.Sum(weekends_off_per_doc[doc]) + fixed_weekends_off[doc]
+    for doc in doctors_list
 }
     
 avg_full_weekends_off = total_full_weekends / len(doctors_list)
 
+# |count - avg| can be at most the distance from avg to 0 or to every weekend off
+diff_ub = max(total_full_weekends - int(avg_full_weekends_off), int(avg_full_weekends_off))
 for doc in doctors_list:
-    diff = model.NewIntVar(0, total_full_weekends, f"diff_{doc}")
+    diff = model.NewIntVar(0, diff_ub, f"diff_{doc_idx[doc]}")
     model.Add(diff >= full_weekends_off_count[doc] - int(avg_full_weekends_off))
     model.Add(diff >= int(avg_full_weekends_off) - full_weekends_off_count[doc])
     balanced_full_wkends_off_deviation_vars.append(diff)
 
-# Collect weekend indices
-saturdays = [i for i, d in enumerate(dates) if d.weekday() == 5]
-sundays = [i for i, d in enumerate(dates) if d.weekday() == 6]
-
-for doc in doctors_list:
+for doc, xd in zip(doctors_list, x_by_doc):
     # Saturdays
-    sat_vars = [x[(i,doc)] for i in saturdays if (i,doc) in x]
+    sat_vars = [xd[i] for i in saturdays if xd[i] is not None]
     if len(sat_vars) > 1:
-        extra_sat = model.NewIntVar(0, len(sat_vars)-1, f"extra_sat_{doc}")
-        model.Add(extra_sat == sum(sat_vars) - 1)
+        extra_sat = model.NewIntVar(0, len(sat_vars)-1, f"extra_sat_{doc_idx[doc]}")
+        model.Add(extra_sat == cp_model.LinearExpr.Sum(sat_vars) - 1)
         different_weekend_duty_day_vars.append(extra_sat)
+        different_weekend_duty_day_ubs.append(len(sat_vars) - 1)
     # Sundays
-    sun_vars = [x[(i,doc)] for i in sundays if (i,doc) in x]
+    sun_vars = [xd[i] for i in sundays if xd[i] is not None]
     if len(sun_vars) > 1:
-        extra_sun = model.NewIntVar(0, len(sun_vars)-1, f"extra_sun_{doc}")
-        model.Add(extra_sun == sum(sun_vars) - 1)
+        extra_sun = model.NewIntVar(0, len(sun_vars)-1, f"extra_sun_{doc_idx[doc]}")
+        model.Add(extra_sun == cp_model.LinearExpr.Sum(sun_vars) - 1)
         different_weekend_duty_day_vars.append(extra_sun)
-
-for doc in doctors_list:
-    # Collect all "full weekend" indices: Fri, Sat, Sun sequences
-    full_weekends = []
-    for i in range(len(dates) - 2):
-        if dates[i].weekday() == 4 and dates[i+1].weekday() == 5 and dates[i+2].weekday() == 6:
-            full_weekends.append((i, i+1, i+2))
-
-    if full_weekends:
-        # For each full weekend, create a bool var that is 1 if doctor is OFF all three days
-        off_weekend_vars = []
-        for fri, sat, sun in full_weekends:
-            off_var = model.NewBoolVar(f"off_full_weekend_{doc}_{fri}")
-            
-            # Check if doctor is assigned on each day (None if unavailable)
-            fri_assigned = x.get((fri, doc), None)
-            sat_assigned = x.get((sat, doc), None)
-            sun_assigned = x.get((sun, doc), None)
-            
-            # Treat unavailable days as already off (0)
-            fri_val = fri_assigned if fri_assigned is not None else model.NewConstant(0)
-            sat_val = sat_assigned if sat_assigned is not None else model.NewConstant(0)
-            sun_val = sun_assigned if sun_assigned is not None else model.NewConstant(0)
-            
-            # off_var = 1 if all three days are free
-            model.Add(fri_val + sat_val + sun_val == 0).OnlyEnforceIf(off_var)
-            model.Add(fri_val + sat_val + sun_val != 0).OnlyEnforceIf(off_var.Not())
-            off_weekend_vars.append(off_var)
-        
-        # Hard constraint: at least one full weekend off
-        model.Add(sum(off_weekend_vars) >= 1)
+        different_weekend_duty_day_ubs.append(len(sun_vars) - 1)
 
 
 # ------------------------------
 # Combine objective into one expression
 # ------------------------------
 # We want to MAXIMIZE good things and MINIMIZE bad things.
-# Convert penalties to negatives inside the Maximize expression.
+# Convert penalties to negative coefficients inside the Maximize expression.
+# Variables and their signed weights are flattened into two parallel lists so
+# the whole objective is built with a single WeightedSum call.
 
-obj_terms = []
+obj_vars = []
+obj_coeffs = []
+obj_ubs = []  # upper bound of each objective variable (all have lower bound 0)
 
 # Full weekend off rewards (positive)
-if full_weekend_off_bonus:
-    obj_terms.append(W_FULL_WKEND_OFF_BONUS * sum(full_weekend_off_bonus))
+obj_vars.extend(full_weekend_off_bonus)
+obj_coeffs.extend([W_FULL_WKEND_OFF_BONUS] * len(full_weekend_off_bonus))
+obj_ubs.extend([1] * len(full_weekend_off_bonus))
 
 # Penalties (negative)
-# if every_other_vars:
-#     obj_terms.append(-W_EVERY_OTHER_PENALTY * sum(every_other_vars))
-
-# if gap2_vars:
-#     obj_terms.append(-W_GAP_PENALTY * sum(gap2_vars))
+# every-other and short-gap (i, i+2) are the same pattern, so they share one
+# variable list and their weights are combined
+# obj_vars.extend(every_other_vars)
+# obj_coeffs.extend([-(W_EVERY_OTHER_PENALTY + W_GAP_PENALTY)] * len(every_other_vars))
+# obj_ubs.extend([1] * len(every_other_vars))
+
+# block_deviation_vars are IntVars — penalize sum of deviations
+obj_vars.extend(block_deviation_vars)
+obj_coeffs.extend([-W_BLOCK_DEV_PENALTY] * len(block_deviation_vars))
+obj_ubs.extend(block_deviation_ubs)
+
+obj_vars.extend(balanced_full_wkends_off_deviation_vars)
+obj_coeffs.extend([-W_BALANCE_FULL_WKENDS_OFF] * len(balanced_full_wkends_off_deviation_vars))
+obj_ubs.extend([diff_ub] * len(balanced_full_wkends_off_deviation_vars))
+
+obj_vars.extend(different_weekend_duty_day_vars)
+obj_coeffs.extend([-W_DIFF_WKEND_DUTY_DAY] * len(different_weekend_duty_day_vars))
+obj_ubs.extend(different_weekend_duty_day_ubs)
+
+# An empty WeightedSum is the constant 0 (but that shouldn't be the case)
+# fixed weekends off still earn their bonus, as a constant, so objective
+# values stay comparable
+fixed_bonus = W_FULL_WKEND_OFF_BONUS * sum(fixed_weekends_off.values())
+full_obj = cp_model.LinearExpr.WeightedSum(obj_vars, obj_coeffs) + fixed_bonus
+
+# Give the objective an explicit domain: rewards at their upper bound give the
+# best case, penalties at their upper bound the worst case
+obj_ub = fixed_bonus + sum(c * ub for c, ub in zip(obj_coeffs, obj_ubs) if c > 0)
+obj_lb = fixed_bonus + sum(c * ub for c, ub in zip(obj_coeffs, obj_ubs) if c < 0)
+obj_var = model.NewIntVar(obj_lb, obj_ub, "obj")
+model.Add(obj_var == full_obj)
+model.Maximize(obj_var)
 
-if block_deviation_vars:
-    # block_deviation_vars are IntVars — penalize sum of deviations
-    obj_terms.append(-W_BLOCK_DEV_PENALTY * sum(block_deviation_vars))
-    
-if balanced_full_wkends_off_deviation_vars:
-    obj_terms.append(-W_BALANCE_FULL_WKENDS_OFF * sum(balanced_full_wkends_off_deviation_vars))
-    
-if different_weekend_duty_day_vars:
-    obj_terms.append(-W_DIFF_WKEND_DUTY_DAY * sum(different_weekend_duty_day_vars))
-
-# If no soft terms, minimize nothing (but that shouldn't be the case)
-full_obj = sum(obj_terms) if obj_terms else 0
-model.Maximize(full_obj)
+# ------------------------------
+# Warm start: greedy round-robin hint
+# ------------------------------
+def greedy_assign(dates, doctors_list, unavail_idx, max_duties):
+    """Fill days round-robin, skipping unavailable doctors, yesterday's doctor
+    and doctors already at max_duties. Returns {day index: doctor}; days no
+    doctor could take are left out."""
+    greedy = {}
+    duties = {doc: 0 for doc in doctors_list}
+    next_doc = 0
+    for i in range(len(dates)):
+        for k in range(len(doctors_list)):
+            doc = doctors_list[(next_doc + k) % len(doctors_list)]
+            if i in unavail_idx[doc] or greedy.get(i - 1) == doc or duties[doc] >= max_duties:
+                continue
+            greedy[i] = doc
+            duties[doc] += 1
+            next_doc = (next_doc + k + 1) % len(doctors_list)
+            break
+    return greedy
+
+# Only hint the days the greedy managed to fill, so a partial warm start
+# does not pin the rest of the calendar
+greedy = greedy_assign(dates, doctors_list, unavail_idx, min(max_days, 7))
+
+# Relabel interchangeable doctors in the greedy schedule so it already follows
+# the lexicographic symmetry-breaking order (earliest differing day first)
+for group in symmetric_groups.values():
+    if len(group) < 2:
+        continue
+    greedy_vec = {doc: tuple(greedy.get(i) == doc for i in range(len(dates))) for doc in group}
+    relabel = dict(zip(sorted(group, key=greedy_vec.get, reverse=True), group))
+    greedy = {i: relabel.get(doc, doc) for i, doc in greedy.items()}
+
+for i, g_doc in greedy.items():
+    for j, var in enumerate(x_arr[i]):
+        if var is not None:
+            model.AddHint(var, 1 if doc_idx[g_doc] == j else 0)
+
+# Hint each block deviation with the value the greedy schedule actually gives
+# it (a blanket 0 would contradict the x hints); skip blocks the greedy left
+# partly empty, where that value is not known
+for dev, (doc, start, end) in zip(block_deviation_vars, block_deviation_spans):
+    if all(i in greedy for i in range(start, end)):
+        greedy_duties = sum(greedy[i] == doc for i in range(start, end))
+        model.AddHint(dev, max(greedy_duties - rounded_ideal_high, rounded_ideal_low - greedy_duties, 0))
 
 # ------------------------------
 # 3. Solve
 # ------------------------------
 solver = cp_model.CpSolver()
 solver.parameters.max_time_in_seconds = SOLVER_TIME_LIMIT
-solver.parameters.num_search_workers = 8
+solver.parameters.num_search_workers = SOLVER_NUM_WORKERS
+solver.parameters.cp_model_presolve = SOLVER_PRESOLVE
+solver.parameters.log_search_progress = SOLVER_LOG_PROGRESS
+solver.parameters.linearization_level = SOLVER_LINEARIZATION_LEVEL
+solver.parameters.cp_model_probing_level = SOLVER_PROBING_LEVEL
+solver.parameters.symmetry_level = SOLVER_SYMMETRY_LEVEL
+solver.parameters.optimize_with_core = SOLVER_OPTIMIZE_WITH_CORE
+solver.parameters.relative_gap_limit = SOLVER_RELATIVE_GAP_LIMIT
+solver.parameters.repair_hint = SOLVER_REPAIR_HINT
 status = solver.Solve(model)
 
 if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
@@ -316,99 +495,107 @@ if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
 # ------------------------------
 # 4. Export to Excel
 # ------------------------------
-schedule = []
-for i, day in enumerate(dates):
-    assigned = None
-    for doc in doctors_list:
-        var = x.get((i, doc), None)
-        if var is not None and solver.Value(var) == 1:
-            assigned = doc
-            break
-    if assigned is None:
-        # should not happen (we forced 1 per day), but be safe
-        assigned = "UNASSIGNED"
-    schedule.append({"Date": day, "Assigned Doctor": assigned})
-
-schedule_df = pd.DataFrame(schedule)
-schedule_df.to_excel(OUT_FILE, index=False)
-print(f"Schedule created: {OUT_FILE}")
-
-# --- Apply styling with openpyxl ---
-wb = load_workbook(OUT_FILE)
-ws = wb.active
+# openpyxl is only needed from here on, so it is imported after the solve: runs
+# that fail earlier (bad input, infeasible model) don't pay for loading it
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import PatternFill, Font, Border, Side, Alignment
+from openpyxl.utils import get_column_letter
 
+# Read the whole solution with one BooleanValues call into a per-day array of
+# doctor indices (-1 = nobody), which the diagnostics then work on with numpy
+sol_pos = [(i, j) for i, day_vars in enumerate(x_arr) for j, var in enumerate(day_vars) if var is not None]
+sol_vals = solver.BooleanValues([x_arr[i][j] for i, j in sol_pos]).to_numpy()
+sol_pos = np.array(sol_pos, dtype=np.int16).reshape(-1, 2)[sol_vals]
+assigned = np.full(len(dates), -1, dtype=np.int16)
+assigned[sol_pos[:, 0]] = sol_pos[:, 1]
+
+# Days left empty (only possible on Tuesdays when there are not enough doctors)
+schedule = [
+    {"Date": dates[i], "Assigned Doctor": doctors_list[j] if j >= 0 else "UNASSIGNED"}
+    for i, j in enumerate(assigned)
+]
+
+# --- Stream the styled rows with a write-only openpyxl workbook ---
+# Rows are written once with their styling attached, so the file is never
+# re-opened and re-saved just to colour the weekends.
+headers = ["Date", "Assigned Doctor"]
+
+wb = Workbook(write_only=True)
+ws = wb.create_sheet("Sheet1")
+
+header_font = Font(bold=True)
+header_border = Border(left=Side(style="thin"), right=Side(style="thin"),
+                       top=Side(style="thin"), bottom=Side(style="thin"))
+header_alignment = Alignment(horizontal="center", vertical="top")
 weekend_fill = PatternFill(start_color="000000", end_color="000000", fill_type="solid")
 weekend_font = Font(color="FFFFFF", bold=True)
 
-for row in range(2, ws.max_row + 1):  # skip header
-    date_cell = ws.cell(row=row, column=1)
-    date_value = pd.to_datetime(date_cell.value).date()
-    if date_value.weekday() >= 5:
-        for col in range(1, ws.max_column + 1):
-            cell = ws.cell(row=row, column=col)
-            cell.fill = weekend_fill
-            cell.font = weekend_font
-
-# Adjust column width based on max length in each column
-for col in ws.columns:
-    max_length = 0
-    col_letter = get_column_letter(col[0].column)
-    for cell in col:
-        try:
-            if cell.value:
-                max_length = max(max_length, len(str(cell.value)))
-        except:
-            pass
-    # Add some padding (e.g., +2)
-    adjusted_width = max_length + 2
-    ws.column_dimensions[col_letter].width = adjusted_width
+# Adjust column width based on max length in each column (+2 padding);
+# write-only sheets need the widths set before any row is appended
+col_widths = [len(h) for h in headers]
+for entry in schedule:
+    col_widths[0] = max(col_widths[0], len(str(entry["Date"])))
+    col_widths[1] = max(col_widths[1], len(str(entry["Assigned Doctor"])))
+for col, width in enumerate(col_widths, start=1):
+    ws.column_dimensions[get_column_letter(col)].width = width + 2
+
+header_row = []
+for h in headers:
+    cell = WriteOnlyCell(ws, value=h)
+    cell.font = header_font
+    cell.border = header_border
+    cell.alignment = header_alignment
+    header_row.append(cell)
+ws.append(header_row)
+
+# Styling is decided once per row: weekday rows are appended as plain values
+# (openpyxl gives dates its default yyyy-mm-dd format), and only weekend
+# rows pay for building styled cells, all sharing the same fill/font objects
+for i, entry in enumerate(schedule):
+    values = [entry["Date"], entry["Assigned Doctor"]]
+    if not is_weekend[i]:
+        ws.append(values)
+        continue
+    row_cells = [WriteOnlyCell(ws, value=v) for v in values]
+    for cell in row_cells:
+        cell.fill = weekend_fill
+        cell.font = weekend_font
+    ws.append(row_cells)
 
 wb.save(OUT_FILE)
+print(f"Schedule created: {OUT_FILE}")
 
 # ------------------------------
 # Diagnostics: print counts
 # ------------------------------
+is_assigned = assigned >= 0
+duties_per_doc = np.bincount(assigned[is_assigned], minlength=num_docs)
+wkend_per_doc = np.bincount(assigned[is_assigned & is_weekend], minlength=num_docs)
+
+# Group day indices by doctor: a stable sort keeps each doctor's days in
+# calendar order, and the duty counts give the split points
+by_doc = np.argsort(assigned, kind="stable")[np.count_nonzero(~is_assigned):]
+days_per_doc = np.split(by_doc, np.cumsum(duties_per_doc)[:-1])
+
+# Doctor index on each Fri/Sat/Sun of every full weekend, shape (weekends, 3)
+wkend_assigned = assigned[np.array(full_weekends, dtype=int).reshape(-1, 3)]
+
 print("\nDuties per doctor:")
-for doc in doctors_list:
-    duties = 0
-    for i in range(len(dates)):
-        var = x.get((i, doc), None)
-        if var is not None and solver.Value(var) == 1:
-            duties += 1
-    print(f"  {doc}: {duties}")
+for j, doc in enumerate(doctors_list):
+    print(f"  {doc}: {duties_per_doc[j]}")
 
 print("\nWeekend duties per doctor:")
-for doc in doctors_list:
-    wend = 0
-    for i, d in enumerate(dates):
-        if is_weekend[d]:
-            var = x.get((i, doc), None)
-            if var is not None and solver.Value(var) == 1:
-                wend += 1
-    print(f"  {doc}: {wend}")
+for j, doc in enumerate(doctors_list):
+    print(f"  {doc}: {wkend_per_doc[j]}")
 
 print("\nAssigned days per doctor (day num + weekday):")
-for doc in doctors_list:
-    assigned_days = []
-    for i in range(len(dates)):
-        var = x.get((i, doc), None)
-        if var is not None and solver.Value(var) == 1:
-            assigned_days.append(dates[i].strftime("%d %a"))
+for j, doc in enumerate(doctors_list):
+    assigned_days = [dates[i].strftime("%d %a") for i in days_per_doc[j]]
     print(f"  {doc}: {', '.join(assigned_days)}")
     
 print("\nFull weekends off (Fri+Sat+Sun) per doctor:")
-for doc in doctors_list:
-    full_wkends = 0
-    for i, day in enumerate(dates):
-        if day.weekday() == 4:  # Friday
-            sat_idx = i + 1 if i + 1 < len(dates) else None
-            sun_idx = i + 2 if i + 2 < len(dates) else None
-            if sat_idx is not None and sun_idx is not None:
-                vars_window = [
-                    x.get((i,doc), 0),        # Friday
-                    x.get((sat_idx,doc), 0),  # Saturday
-                    x.get((sun_idx,doc), 0)   # Sunday
-                ]
-                if all(solver.Value(v) == 0 for v in vars_window):
-                    full_wkends += 1
+for j, doc in enumerate(doctors_list):
+    # Friday, Saturday and Sunday all assigned to someone else (or left empty)
+    full_wkends = np.count_nonzero((wkend_assigned != j).all(axis=1))
     print(f"  {doc}: {full_wkends}")